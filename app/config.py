@@ -1,15 +1,24 @@
+import json
 import logging
 import os
 import sys
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class Config:
     def __init__(self):
         # General settings
         current_dir = os.path.dirname(os.path.abspath(__file__))
         self.SESSIONS_DIR = os.path.join(current_dir, "sessions")
-        self.COOKIES_FILE = "../cookies.pkl"
+        self.CHANNEL_INFO_CACHE_FILE = os.path.join(current_dir, "cache", "channel_info.sqlite")
+        self.COOKIES_FILE = "../cookies.json"
         self.BASE_URL = "https://uk.tgstat.com"
+        # Unset lets Selenium Manager locate (or download) a matching driver
+        self.CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")
         self._load_env_vars()
 
     def _load_env_vars(self):
@@ -19,6 +28,19 @@ class Config:
             "https://api.proxyscrape.com/v4/free-proxy-list/get?request=display_proxies&protocol=http&proxy_format=protocolipport&format=json&timeout=20000"
         )
 
+        # Telegram settings: flood waits up to this many seconds are slept
+        # through in place by Telethon instead of raising FloodWaitError
+        self.FLOOD_SLEEP_THRESHOLD = int(os.environ.get("FLOOD_SLEEP_THRESHOLD", "60"))
+        # Maximum in-flight requests per Telegram session
+        self.RPC_CONCURRENCY = int(os.environ.get("RPC_CONCURRENCY", "4"))
+
+        # Channels crawled more recently than this are skipped on the next run
+        self.RECRAWL_INTERVAL_HOURS = int(os.environ.get("RECRAWL_INTERVAL_HOURS", "24"))
+
+        # Channel info cache settings (seconds)
+        self.CHANNEL_INFO_CACHE_TTL = int(os.environ.get("CHANNEL_INFO_CACHE_TTL", "3600"))
+        self.CHANNEL_INFO_CACHE_JITTER = int(os.environ.get("CHANNEL_INFO_CACHE_JITTER", "600"))
+
         # Database settings
         self.POSTGRES_HOST = os.environ.get("POSTGRES_HOST", "localhost")
         self.POSTGRES_PORT = os.environ.get("POSTGRES_PORT", "5433")
@@ -32,6 +54,23 @@ class Config:
         self.NEO4J_USER = os.environ.get("NEO4J_USER", "neo4j")
         self.NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD", "password")
 
+    @staticmethod
+    def read_json(path):
+        with open(path, "rb") as file:
+            data = file.read()
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def write_json(path, obj):
+        if orjson is not None:
+            data = orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        else:
+            data = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(path, "wb") as file:
+            file.write(data)
+
     @staticmethod
     def setup_logging():
         logging.basicConfig(
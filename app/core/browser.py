@@ -0,0 +1,59 @@
+import functools
+import threading
+from typing import Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.driver_finder import DriverFinder
+
+from app.config import config
+
+_service: Optional[Service] = None
+_browser_path: Optional[str] = None
+_service_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _user_agents():
+    # fake_useragent reads its bundled database on construction, so it is
+    # only loaded once and only by code that actually starts a browser
+    from fake_useragent import UserAgent
+
+    return UserAgent()
+
+
+def random_user_agent() -> str:
+    return _user_agents().random
+
+
+def get_chrome_service(options: Options) -> Service:
+    global _service, _browser_path
+    with _service_lock:
+        if _service is None:
+            service = Service(executable_path=config.CHROMEDRIVER_PATH)
+            # Same lookup webdriver.Chrome does: without a configured path,
+            # Selenium Manager finds or downloads a matching driver and browser
+            finder = DriverFinder(service, options)
+            service.path = finder.get_driver_path()
+            _browser_path = finder.get_browser_path()
+            service.start()
+            _service = service
+        return _service
+
+
+def stop_chrome_service():
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.stop()
+            _service = None
+
+
+def new_chrome_driver(options: Options) -> webdriver.Remote:
+    # Every driver is a session on one shared chromedriver process, so only
+    # the first launch pays for starting it
+    service = get_chrome_service(options)
+    if _browser_path:
+        options.binary_location = _browser_path
+    return webdriver.Remote(command_executor=service.service_url, options=options)
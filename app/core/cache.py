@@ -0,0 +1,87 @@
+import json
+import os
+import random
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from app.config import logger, config
+
+
+class ChannelInfoCache:
+    def __init__(self):
+        self.cache_file = config.CHANNEL_INFO_CACHE_FILE
+        self.ttl = config.CHANNEL_INFO_CACHE_TTL
+        self.jitter = config.CHANNEL_INFO_CACHE_JITTER
+        # Writes are committed in batches; each commit is an fsync on the event loop
+        self.commit_every = 100
+        self._pending_writes = 0
+        self.connection = self._connect()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            connection = sqlite3.connect(self.cache_file)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS channel_info ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            connection.commit()
+            return connection
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open channel info cache, caching disabled: {e}")
+            return None
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.connection:
+            return None
+
+        try:
+            row = self.connection.execute(
+                "SELECT value, stored_at FROM channel_info WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading channel info cache for {key}: {e}")
+            return None
+
+        if not row:
+            return None
+
+        value, stored_at = row
+        # Entries expire somewhere between ttl and ttl + jitter so channels
+        # cached in the same run are not all refreshed at once
+        if time.time() - stored_at > self.ttl + random.random() * self.jitter:
+            return None
+
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict):
+        if not self.connection:
+            return
+
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO channel_info (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_every:
+                self.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Error writing channel info cache for {key}: {e}")
+
+    def commit(self):
+        if not self.connection or not self._pending_writes:
+            return
+
+        try:
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Error committing channel info cache: {e}")
+        self._pending_writes = 0
+
+    def close(self):
+        if self.connection:
+            self.commit()
+            self.connection.close()
+            self.connection = None
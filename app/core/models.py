@@ -5,8 +5,10 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     Date,
+    DateTime,
     BigInteger,
     JSON,
+    UniqueConstraint,
 )
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
@@ -65,6 +67,7 @@ class Channel(Base):
     subscribers = Column(Integer, nullable=True)
     verified = Column(Boolean, default=False)
     created_at = Column(Date, nullable=True)
+    last_crawled_at = Column(DateTime(timezone=True), nullable=True)
 
     similar_to = relationship(
         "ChannelSimilar",
@@ -135,6 +138,7 @@ class ChannelRelated(Base):
 
 class ChannelMessage(Base):
     __tablename__ = "channel_messages"
+    __table_args__ = (UniqueConstraint("channel_id", "message_id"),)
 
     id = Column(Integer, primary_key=True)
     channel_id = Column(
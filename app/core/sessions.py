@@ -2,6 +2,7 @@ import asyncio
 import glob
 import os
 import random
+import time
 from typing import Dict, Optional, Tuple, Set
 
 from telethon import TelegramClient
@@ -18,6 +19,8 @@ class SessionManager:
         self.clients: Dict[str, TelegramClient] = {}
         self.busy_sessions: Set[str] = set()
         self.banned_sessions: Set[str] = set()
+        self.flood_cooldowns: Dict[str, float] = {}
+        self.rpc_semaphores: Dict[str, asyncio.Semaphore] = {}
         self.lock = asyncio.Lock()
         self.proxy_manager = ProxiesManager()
 
@@ -32,6 +35,41 @@ class SessionManager:
             if session_name in self.busy_sessions:
                 self.busy_sessions.remove(session_name)
 
+    def get_rpc_semaphore(self, session_name: str) -> asyncio.Semaphore:
+        # Caps concurrent requests on one client regardless of the caller
+        if session_name not in self.rpc_semaphores:
+            self.rpc_semaphores[session_name] = asyncio.Semaphore(config.RPC_CONCURRENCY)
+        return self.rpc_semaphores[session_name]
+
+    def mark_session_flooded(self, session_name: str, seconds: int):
+        logger.warning(f"Session {session_name} is flood limited for {seconds} seconds")
+        self.flood_cooldowns[session_name] = time.monotonic() + seconds
+
+    def is_session_cooling_down(self, session_name: str) -> bool:
+        cooldown_until = self.flood_cooldowns.get(session_name)
+        if cooldown_until is None:
+            return False
+        if time.monotonic() >= cooldown_until:
+            del self.flood_cooldowns[session_name]
+            return False
+        return True
+
+    def get_cooldown_remaining(self) -> float:
+        """Seconds until an idle session is out of flood cooldown, 0 if one already is"""
+        now = time.monotonic()
+        remaining = []
+        for session_file in self.session_files:
+            session_name = os.path.splitext(os.path.basename(session_file))[0]
+            if session_name in self.banned_sessions or session_name in self.busy_sessions:
+                continue
+
+            cooldown_until = self.flood_cooldowns.get(session_name)
+            if cooldown_until is None or cooldown_until <= now:
+                return 0.0
+            remaining.append(cooldown_until - now)
+
+        return min(remaining, default=0.0)
+
     def get_available_session_count(self):
         return len(self.session_files) - len(self.banned_sessions)
 
@@ -51,6 +89,9 @@ class SessionManager:
                 if session_name in self.busy_sessions or session_name in self.banned_sessions:
                     continue
 
+                if self.is_session_cooling_down(session_name):
+                    continue
+
                 if session_name not in self.clients:
                     # Random delay to avoid too many connections at once
                     delay = random.uniform(0.5, 3.0)
@@ -69,6 +110,7 @@ class SessionManager:
                         "app_version": "4.16.8 arm64",
                         "lang_code": "en",
                         "system_lang_code": "en",
+                        "flood_sleep_threshold": config.FLOOD_SLEEP_THRESHOLD,
                     }
 
                     if proxy:
@@ -1,5 +1,10 @@
 import asyncio
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from app.config import logger
 from app.core.database import init_db
 from app.services.telegram_service import TelegramCrawler
@@ -33,4 +38,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
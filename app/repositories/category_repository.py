@@ -1,6 +1,7 @@
-from typing import Dict, List
+from datetime import timedelta
+from typing import Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import logger
@@ -35,7 +36,9 @@ class CategoryRepository:
 
         return channels_by_category
 
-    async def get_channel_urls_by_category(self, category_name: str) -> List[str]:
+    async def get_channel_urls_by_category(
+        self, category_name: str, recrawl_interval: Optional[timedelta] = None
+    ) -> List[str]:
         stmt = select(Category).where(Category.name == category_name)
         result = await self.session.execute(stmt)
         category = result.scalar_one_or_none()
@@ -48,6 +51,15 @@ class CategoryRepository:
             .join(CategoryLink)
             .where(CategoryLink.category_id == category.id)
         )
+
+        if recrawl_interval is not None:
+            # Skip channels crawled within the interval
+            stmt = stmt.outerjoin(Channel, Channel.link == Link.url).where(
+                or_(
+                    Channel.last_crawled_at.is_(None),
+                    Channel.last_crawled_at < func.now() - recrawl_interval,
+                )
+            )
         result = await self.session.execute(stmt)
         links = result.scalars().all()
 
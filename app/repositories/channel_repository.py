@@ -1,8 +1,9 @@
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import logger
@@ -84,6 +85,85 @@ class ChannelRepository:
             logger.error(f"Error creating/updating channel: {e}")
             return None
 
+    def _channel_row(self, channel_data: Dict) -> Dict:
+        return {
+            "channel_id": channel_data.get("id"),
+            "name": channel_data.get("name"),
+            "link": channel_data["link"],
+            "subscribers": channel_data.get("subscribers"),
+            "verified": channel_data.get("verified", False),
+            "created_at": self.parse_date(channel_data.get("created_at")),
+        }
+
+    @staticmethod
+    def _is_deadlock(error: DBAPIError) -> bool:
+        orig = error.orig
+        return (
+            getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+        ) == "40P01"
+
+    async def bulk_get_or_create_channels(self, channels_data: List[Dict]) -> Dict[str, int]:
+        # Keyed by link: a single upsert can't touch the same row twice.
+        # Sorted so concurrent upserts of overlapping sets lock rows in the
+        # same order and can't deadlock each other
+        rows_by_link = {
+            data["link"]: self._channel_row(data)
+            for data in channels_data
+            if data.get("link")
+        }
+        rows = [rows_by_link[link] for link in sorted(rows_by_link)]
+        if not rows:
+            return {}
+
+        try:
+            stmt = pg_insert(Channel).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Channel.link],
+                set_={
+                    "channel_id": stmt.excluded.channel_id,
+                    "name": stmt.excluded.name,
+                    # Basic lookups carry no subscriber count, keep the stored one
+                    "subscribers": func.coalesce(
+                        stmt.excluded.subscribers, Channel.subscribers
+                    ),
+                    "verified": stmt.excluded.verified,
+                    "created_at": stmt.excluded.created_at,
+                },
+            ).returning(Channel.link, Channel.id)
+            result = await self.session.execute(stmt)
+            channel_ids = {link: channel_id for link, channel_id in result.all()}
+            await self.session.commit()
+            return channel_ids
+
+        except DBAPIError as e:
+            await self.session.rollback()
+            if not isinstance(e, IntegrityError) and not self._is_deadlock(e):
+                logger.error(f"Error bulk creating/updating channels: {e}")
+                return {}
+
+            # e.g. a channel_id already stored under another link, or a
+            # deadlock with a concurrent upsert; fall back to row-by-row so
+            # the whole batch isn't dropped
+            logger.warning(f"Bulk channel upsert failed, retrying per channel: {e}")
+            channels = [
+                await self.get_or_create_channel(data) for data in channels_data
+            ]
+            return {channel.link: channel.id for channel in channels if channel}
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(f"Error bulk creating/updating channels: {e}")
+            return {}
+
+    async def mark_channel_crawled(self, channel: Channel) -> bool:
+        try:
+            channel.last_crawled_at = datetime.now(timezone.utc)
+            await self.session.commit()
+            return True
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(f"Error marking channel {channel.link} as crawled: {e}")
+            return False
+
     async def add_similar_channel(
         self, main_channel: Channel, similar_channel: Channel
     ) -> bool:
@@ -131,6 +211,62 @@ class ChannelRepository:
             logger.error(f"Error adding related channel relationship: {e}")
             return False
 
+    async def add_similar_channels(
+        self, main_channel: Channel, similar_channel_ids: List[int]
+    ) -> bool:
+        if not similar_channel_ids:
+            return True
+
+        try:
+            stmt = (
+                pg_insert(ChannelSimilar)
+                .values(
+                    [
+                        {
+                            "main_channel_id": main_channel.id,
+                            "similar_channel_id": similar_channel_id,
+                        }
+                        for similar_channel_id in similar_channel_ids
+                    ]
+                )
+                .on_conflict_do_nothing()
+            )
+            await self.session.execute(stmt)
+            await self.session.commit()
+            return True
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(f"Error adding similar channel relationships: {e}")
+            return False
+
+    async def add_related_channels(
+        self, main_channel: Channel, related_channel_ids: List[int]
+    ) -> bool:
+        if not related_channel_ids:
+            return True
+
+        try:
+            stmt = (
+                pg_insert(ChannelRelated)
+                .values(
+                    [
+                        {
+                            "main_channel_id": main_channel.id,
+                            "related_channel_id": related_channel_id,
+                        }
+                        for related_channel_id in related_channel_ids
+                    ]
+                )
+                .on_conflict_do_nothing()
+            )
+            await self.session.execute(stmt)
+            await self.session.commit()
+            return True
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(f"Error adding related channel relationships: {e}")
+            return False
+
     async def get_channels_by_category(self, category_name: str) -> List[Channel]:
         try:
             query = (
@@ -370,6 +506,38 @@ class ChannelRepository:
             )
             return None
 
+    async def save_channel_messages_bulk(
+        self, channel_id: int, messages: List[Tuple[int, Dict]]
+    ) -> bool:
+        if not messages:
+            return True
+
+        try:
+            stmt = pg_insert(ChannelMessage).values(
+                [
+                    {
+                        "channel_id": channel_id,
+                        "message_id": message_id,
+                        "data": message_data,
+                    }
+                    for message_id, message_data in messages
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ChannelMessage.channel_id, ChannelMessage.message_id],
+                set_={"data": stmt.excluded.data},
+            )
+            await self.session.execute(stmt)
+            await self.session.commit()
+            return True
+
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(
+                f"Error saving {len(messages)} messages for channel {channel_id}: {e}"
+            )
+            return False
+
     async def get_channel_messages(
         self, channel_id: int, limit: int = 100, offset: int = 0
     ) -> List[Dict]:
@@ -413,3 +581,31 @@ class ChannelRepository:
                 f"Error getting latest message ID for channel {channel_id}: {e}"
             )
             return None
+
+    async def get_latest_message_ids_by_categories(
+        self, category_names: List[str]
+    ) -> Dict[int, Optional[int]]:
+        """Latest stored message ID of every known channel in the given categories
+
+        Resolved entirely server-side, so the result size isn't bounded by
+        the bind parameter limit. Channels without messages map to None.
+        """
+        if not category_names:
+            return {}
+
+        try:
+            query = (
+                select(Channel.id, func.max(ChannelMessage.message_id))
+                .select_from(Category)
+                .join(CategoryLink, CategoryLink.category_id == Category.id)
+                .join(Link, Link.id == CategoryLink.link_id)
+                .join(Channel, Channel.link == Link.url)
+                .outerjoin(ChannelMessage, ChannelMessage.channel_id == Channel.id)
+                .where(Category.name.in_(category_names))
+                .group_by(Channel.id)
+            )
+            result = await self.session.execute(query)
+            return {channel_id: message_id for channel_id, message_id in result.all()}
+        except Exception as e:
+            logger.error(f"Error getting latest message IDs for categories: {e}")
+            return {}
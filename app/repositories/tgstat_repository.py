@@ -1,11 +1,18 @@
 from typing import List
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, column, literal, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import logger
 from app.core.models import Category, Link, CategoryLink
 
+# Above this many links COPY beats a multi-row INSERT
+COPY_THRESHOLD = 100
+
+# Session-local temp table created by insert_links for large batches
+links_staging = table("links_staging", column("url"))
+
 
 class TGStatRepository:
     def __init__(self, session: AsyncSession):
@@ -61,6 +68,35 @@ class TGStatRepository:
             logger.error(f"Error adding link to category: {e}")
             return False
 
+    async def insert_links(self, urls: List[str]) -> bool:
+        """Insert missing links; returns True if the URLs were staged in links_staging"""
+        if len(urls) <= COPY_THRESHOLD:
+            await self.session.execute(
+                pg_insert(Link)
+                .values([{"url": url} for url in urls])
+                .on_conflict_do_nothing(index_elements=[Link.url])
+            )
+            return False
+
+        # COPY has no ON CONFLICT, so stage the URLs in a temp table on the
+        # session's own connection and merge them from there
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        await driver_connection.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS links_staging (url varchar) ON COMMIT DELETE ROWS"
+        )
+        await driver_connection.copy_records_to_table(
+            "links_staging", records=[(url,) for url in urls], columns=["url"]
+        )
+        await self.session.execute(
+            text(
+                "INSERT INTO links (url) SELECT url FROM links_staging "
+                "ON CONFLICT (url) DO NOTHING"
+            )
+        )
+        return True
+
     async def save_channels_for_category(
         self, category_name: str, channel_urls: List[str]
     ) -> bool:
@@ -68,13 +104,29 @@ class TGStatRepository:
             category = await self.get_or_create_category(category_name)
             logger.info(f"Category created/found: {category.name} (id={category.id})")
 
-            for url in channel_urls:
-                link = await self.get_or_create_link(url)
-                logger.info(f"Link created/found: {link.url} (id={link.id})")
-
-                added = await self.add_link_to_category(category.id, link.id)
-                if added:
-                    logger.info(f"Added category {category_name} to link {url}")
+            if channel_urls:
+                urls = list(dict.fromkeys(channel_urls))
+                staged = await self.insert_links(urls)
+
+                # Link ids are resolved server-side, so no id list makes a
+                # round trip through the client; staged URLs are joined
+                # rather than sent again as bind parameters
+                link_ids = select(literal(category.id), Link.id)
+                if staged:
+                    link_ids = link_ids.join(
+                        links_staging, links_staging.c.url == Link.url
+                    )
+                else:
+                    link_ids = link_ids.where(Link.url.in_(urls))
+
+                result = await self.session.execute(
+                    pg_insert(CategoryLink)
+                    .from_select(["category_id", "link_id"], link_ids)
+                    .on_conflict_do_nothing()
+                )
+                logger.info(
+                    f"Added category {category_name} to {result.rowcount} links"
+                )
 
             await self.session.commit()
             logger.info(
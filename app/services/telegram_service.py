@@ -1,37 +1,77 @@
 import base64
 import asyncio
-from typing import Dict, List, Optional, Tuple, Any, Set
+import random
+import datetime
+import operator
+import re
+from typing import Dict, List, Optional, Tuple, Any, Set, AsyncIterator
 
 from telethon import functions, types
 from telethon.errors.rpcerrorlist import FloodWaitError, UserDeactivatedBanError
 from telethon.tl.functions.channels import GetFullChannelRequest
 
-from app.config import logger
+from app.config import logger, config
+from app.core.cache import ChannelInfoCache
 from app.core.database import async_session
 from app.core.sessions import SessionManager
 from app.repositories.category_repository import CategoryRepository
 from app.repositories.channel_repository import ChannelRepository
 
+# Last path segment of a channel URL, with the invite marker (joinchat/ or +)
+# and a leading @ split off
+_CHANNEL_URL_RE = re.compile(r"(?:^|/)(joinchat/|\+)?@?([\w-]+)/?$")
+_CHANNEL_ATTRS = operator.attrgetter("title", "id", "participants_count", "verified", "date")
+_ISOFORMAT_TYPES = (datetime.date, datetime.time)
+_CONVERTED_TYPES = (bytes,) + _ISOFORMAT_TYPES
+
 
 class TelegramCrawler:
     def __init__(self, max_workers: int):
         self.session_manager = SessionManager()
+        self.channel_info_cache = ChannelInfoCache()
         self.processed_channels: Set[str] = set()
-        self.processed_message_cache = {}
         self.batch_size = 100
+        self.extract_concurrency = 16
+        self.related_concurrency = 8
+        self.max_retries = 8
+        self._retry_tasks: Set[asyncio.Task] = set()
         self.max_workers = max_workers
         self.channel_queue = asyncio.Queue()
         self.active_workers = 0
-        self.worker_lock = asyncio.Lock()
+        # Latest stored message ID per channel (None when nothing is stored yet)
+        self._latest_id_by_channel: Dict[int, Optional[int]] = {}
+        # Row IDs of channels already upserted during this run, by link
+        self._channel_id_cache: Dict[str, int] = {}
+        # Access hashes are per account, so entries are keyed by session too
+        self._input_entity_cache: Dict[Tuple[str, Any], Any] = {}
+
+    async def _rpc(self, client, request, session_name: str):
+        async with self.session_manager.get_rpc_semaphore(session_name):
+            return await client(request)
+
+    async def _get_input_entity(self, client, peer, session_name: str):
+        key = (session_name, peer)
+        input_entity = self._input_entity_cache.get(key)
+        if input_entity is None:
+            async with self.session_manager.get_rpc_semaphore(session_name):
+                input_entity = await client.get_input_entity(peer)
+            self._input_entity_cache[key] = input_entity
+        return input_entity
 
     async def get_channel_from_url(
             self, client, channel_url: str, session_name: str
     ) -> Tuple[Optional[Dict], Optional[Any]]:
+        match = _CHANNEL_URL_RE.search(channel_url)
+        if not match:
+            logger.error(f"[{session_name}] Unrecognized channel URL: {channel_url}")
+            return None, None
+
+        invite_prefix, identifier = match.groups()
         try:
-            if "joinchat" in channel_url:
-                return await self._process_invite_link(client, channel_url, session_name)
+            if invite_prefix:
+                return await self._process_invite_link(client, identifier, channel_url, session_name)
             else:
-                return await self._process_public_channel(client, channel_url, session_name)
+                return await self._process_public_channel(client, identifier, channel_url, session_name)
         except (FloodWaitError, UserDeactivatedBanError):
             raise
         except Exception as e:
@@ -39,16 +79,19 @@ class TelegramCrawler:
             return None, None
 
     async def _process_invite_link(
-            self, client, channel_url: str, session_name: str
+            self, client, invite_hash: str, channel_url: str, session_name: str
     ) -> Tuple[Optional[Dict], Optional[Any]]:
-        invite_hash = channel_url.split("/")[-1]
         try:
-            invite_result = await client(
-                functions.messages.CheckChatInviteRequest(hash=invite_hash)
+            invite_result = await self._rpc(
+                client, functions.messages.CheckChatInviteRequest(hash=invite_hash), session_name
             )
 
             if hasattr(invite_result, "chat"):
                 entity = invite_result.chat
+                if getattr(entity, "access_hash", None) is not None:
+                    self._input_entity_cache[(session_name, entity.id)] = types.InputChannel(
+                        channel_id=entity.id, access_hash=entity.access_hash
+                    )
                 channel_info = self._extract_basic_channel_info(entity, channel_url)
                 return channel_info, entity
             else:
@@ -61,21 +104,18 @@ class TelegramCrawler:
             return None, None
 
     async def _process_public_channel(
-            self, client, channel_url: str, session_name: str
+            self, client, username: str, channel_url: str, session_name: str
     ) -> Tuple[Optional[Dict], Optional[Any]]:
-        username = channel_url.split("/")[-1]
-        if username.startswith("@"):
-            username = username[1:]
-
         input_entity = None
 
         try:
-            input_entity = await client.get_input_entity(username)
-            result = await client(GetFullChannelRequest(input_entity))
+            input_entity = await self._get_input_entity(client, username, session_name)
+            result = await self._rpc(client, GetFullChannelRequest(input_entity), session_name)
             entity = result.chats[0] if result.chats else None
             full_chat = result.full_chat
 
             if entity and full_chat:
+                self._input_entity_cache[(session_name, entity.id)] = input_entity
                 channel_info = self._extract_channel_info(
                     entity, full_chat, channel_url
                 )
@@ -97,24 +137,28 @@ class TelegramCrawler:
             logger.error(f"[{session_name}] Error getting input entity for {channel_url}: {e} ({type(e)})")
             return None, None
 
-    async def get_channel_info_by_id(
+    async def get_channel_basic_by_id(
             self, client, channel_id: int, session_name: str
     ) -> Tuple[Optional[Dict], Optional[Any]]:
+        """Get channel info by ID without GetFullChannelRequest; subscribers may be missing"""
+        cache_key = f"basic-id:{channel_id}"
+        cached_info = self.channel_info_cache.get(cache_key)
+        if cached_info:
+            return cached_info, None
+
         try:
-            entity = await client.get_entity(channel_id)
-            result = await client(GetFullChannelRequest(entity))
-            entity = result.chats[0] if result.chats else None
-            full_chat = result.full_chat
-            if entity:
-                channel_link = (
-                    f"https://t.me/{entity.username}"
-                    if hasattr(entity, "username") and entity.username
-                    else None
-                )
-                channel_info = self._extract_channel_info(entity, full_chat, channel_link)
-                channel_info["id"] = channel_id
-                return channel_info, entity
-            return None, None
+            input_entity = await self._get_input_entity(client, channel_id, session_name)
+            async with self.session_manager.get_rpc_semaphore(session_name):
+                entity = await client.get_entity(input_entity)
+            channel_link = (
+                f"https://t.me/{entity.username}"
+                if getattr(entity, "username", None)
+                else None
+            )
+            channel_info = self._extract_basic_channel_info(entity, channel_link)
+            channel_info["id"] = channel_id
+            self.channel_info_cache.set(cache_key, channel_info)
+            return channel_info, entity
         except (FloodWaitError, UserDeactivatedBanError):
             raise
         except Exception as e:
@@ -125,21 +169,27 @@ class TelegramCrawler:
     def _extract_basic_channel_info(
             entity, channel_url: Optional[str]
     ) -> Dict[str, Any]:
-        return {
-            "name": (
+        try:
+            name, channel_id, subscribers, verified, created_at = _CHANNEL_ATTRS(entity)
+        except AttributeError:
+            # Basic groups and input peers lack some channel fields
+            channel_id = getattr(entity, "id", None)
+            name = (
                 entity.title
                 if hasattr(entity, "title")
                 else f"Channel {getattr(entity, 'id', 'Unknown')}"
-            ),
+            )
+            subscribers = getattr(entity, "participants_count", None)
+            verified = getattr(entity, "verified", False)
+            created_at = getattr(entity, "date", None)
+
+        return {
+            "name": name,
             "link": channel_url,
-            "id": getattr(entity, "id", None),
-            "subscribers": getattr(entity, "participants_count", None),
-            "verified": getattr(entity, "verified", False),
-            "created_at": (
-                entity.date.strftime("%d.%m.%Y")
-                if hasattr(entity, "date") and entity.date
-                else None
-            ),
+            "id": channel_id,
+            "subscribers": subscribers,
+            "verified": verified,
+            "created_at": created_at.strftime("%d.%m.%Y") if created_at else None,
         }
 
     def _extract_channel_info(
@@ -149,6 +199,24 @@ class TelegramCrawler:
         channel_info["subscribers"] = getattr(full_chat, "participants_count", None)
         return channel_info
 
+    async def _get_similar_channel_info(
+            self, client, ch, channel_link: str, session_name: str
+    ) -> Optional[Dict]:
+        cache_key = f"url:{channel_link}"
+        cached_info = self.channel_info_cache.get(cache_key)
+        if cached_info:
+            return cached_info
+
+        try:
+            full_result = await self._rpc(client, GetFullChannelRequest(ch), session_name)
+        except Exception as e:
+            logger.warning(f"[{session_name}] Error getting details for similar channel {channel_link}: {e}")
+            return None
+
+        channel_info = self._extract_channel_info(ch, full_result.full_chat, channel_link)
+        self.channel_info_cache.set(cache_key, channel_info)
+        return channel_info
+
     async def get_similar_channels(
             self, client, entity, channel_url: str, session_name: str
     ) -> List[Dict]:
@@ -159,33 +227,37 @@ class TelegramCrawler:
                 )
                 return []
 
-            input_channel = types.InputChannel(
+            input_channel = self._input_entity_cache.get(
+                (session_name, entity.id)
+            ) or types.InputChannel(
                 channel_id=entity.id, access_hash=entity.access_hash
             )
-            result = await client(
+            result = await self._rpc(
+                client,
                 functions.channels.GetChannelRecommendationsRequest(
                     channel=input_channel
-                )
+                ),
+                session_name,
             )
 
             if not result:
                 return []
 
-            similar_channels = []
-            for ch in result.chats:
-                if hasattr(ch, "username") and ch.username:
-                    channel_link = f"https://t.me/{ch.username}"
-                    try:
-                        result = await client(GetFullChannelRequest(ch))
-                        full_chat = result.full_chat
-                        similar_channels.append(
-                            self._extract_channel_info(ch, full_chat, channel_link)
-                        )
-                    except Exception as e:
-                        logger.warning(f"[{session_name}] Error getting details for similar channel {channel_link}: {e}")
-                        continue
+            public_chats = [
+                (ch, f"https://t.me/{ch.username}")
+                for ch in result.chats
+                if getattr(ch, "username", None)
+            ]
+
+            # Full info requests are independent, so issue them concurrently
+            similar_channels = await asyncio.gather(
+                *[
+                    self._get_similar_channel_info(client, ch, channel_link, session_name)
+                    for ch, channel_link in public_chats
+                ]
+            )
 
-            return similar_channels
+            return [channel_info for channel_info in similar_channels if channel_info]
         except (FloodWaitError, UserDeactivatedBanError):
             # Let these errors propagate up for special handling
             raise
@@ -193,117 +265,156 @@ class TelegramCrawler:
             logger.error(f"[{session_name}] Error retrieving similar channels for {channel_url}: {e}")
             return []
 
-    async def get_channel_messages(
-            self, client, entity, offset_id: int, min_id: Optional[int] = None, session_name: str = ""
-    ) -> List:
+    async def iter_message_batches(
+            self, client, entity, min_id: Optional[int] = None, session_name: str = ""
+    ) -> AsyncIterator[List]:
+        """Yield channel messages oldest-first in batches of batch_size from a single iterator"""
+        batch = []
+        rpc_semaphore = self.session_manager.get_rpc_semaphore(session_name)
+        # Without a limit Telethon sleeps 1 s between history pages
+        # (wait_time), which would also hold an RPC slot while idle
+        messages = client.iter_messages(
+            entity, min_id=min_id or 0, reverse=True, wait_time=0
+        )
         try:
-            messages = []
-
-            if min_id:
-                async for message in client.iter_messages(
-                        entity,
-                        min_id=min_id,
-                        limit=self.batch_size,
-                        offset_id=offset_id,
-                        reverse=True,
-                ):
-                    messages.append(message)
-            else:
-                async for message in client.iter_messages(
-                        entity, limit=self.batch_size, offset_id=offset_id, reverse=True
-                ):
-                    messages.append(message)
-
-            return messages
+            while True:
+                # Only hold the semaphore while the iterator may be fetching a page
+                async with rpc_semaphore:
+                    try:
+                        message = await messages.__anext__()
+                    except StopAsyncIteration:
+                        break
+                batch.append(message)
+                if len(batch) == self.batch_size:
+                    yield batch
+                    batch = []
         except FloodWaitError:
             logger.warning(f"[{session_name}] Flood wait error when fetching messages")
             raise
         except Exception as e:
             logger.error(f"[{session_name}] Error getting channel messages: {e}")
-            return []
+
+        if batch:
+            yield batch
 
     @staticmethod
-    async def extract_forwarded_channels(messages, main_channel_id=None, session_name: str = "") -> List[int]:
+    def extract_forwarded_channels(messages, main_channel_id=None, session_name: str = "") -> List[int]:
         """Extract channel IDs from forwarded messages"""
         try:
-            forwarded_channels = []
-            for message in messages:
-                if message.fwd_from and hasattr(message.fwd_from, "from_id"):
-                    try:
-                        if hasattr(message.fwd_from.from_id, "channel_id"):
-                            channel_id = message.fwd_from.from_id.channel_id
-                            if (
-                                    channel_id
-                                    and channel_id != main_channel_id
-                                    and channel_id not in forwarded_channels
-                            ):
-                                forwarded_channels.append(channel_id)
-                    except Exception as e:
-                        logger.error(f"[{session_name}] Error extracting forwarded channel ID: {e}")
-                        continue
+            fwd_channel_ids = (
+                getattr(getattr(message.fwd_from, "from_id", None), "channel_id", None)
+                for message in messages
+                if message.fwd_from
+            )
+            # dict.fromkeys dedupes while keeping first-seen order
+            forwarded_channels = list(dict.fromkeys(
+                channel_id
+                for channel_id in fwd_channel_ids
+                if channel_id and channel_id != main_channel_id
+            ))
 
-            logger.info(f"[{session_name}] Found {len(forwarded_channels)} related channel IDs")
             return forwarded_channels
         except Exception as e:
             logger.error(f"[{session_name}] Error getting related channel IDs: {e}")
             return []
 
+    @staticmethod
+    def _sanitize_value(value: Any) -> Any:
+        if isinstance(value, bytes):
+            return base64.b64encode(value).decode("utf-8")
+        if isinstance(value, _ISOFORMAT_TYPES):
+            return value.isoformat()
+        return value
+
     def _sanitize_for_json(self, data: Any) -> Any:
-        """Recursively convert non-serializable objects to serializable format"""
-        if isinstance(data, bytes):
-            return base64.b64encode(data).decode("utf-8")
-        elif isinstance(data, dict):
-            return {k: self._sanitize_for_json(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._sanitize_for_json(item) for item in data]
-        elif hasattr(data, "isoformat") and callable(getattr(data, "isoformat")):
-            return data.isoformat()
-        else:
-            return data
-
-    async def extract_message_data(self, client, entity, message, session_name: str) -> Dict:
+        """Convert non-serializable values to a serializable format in place.
+
+        Walks nested dicts and lists with an explicit stack rather than
+        recursion; the containers come fresh from extract_message_data
+        so rewriting their leaves is safe.
+        """
+        if not isinstance(data, (dict, list)):
+            return self._sanitize_value(data)
+
+        stack = [data]
+        while stack:
+            container = stack.pop()
+            items = container.items() if isinstance(container, dict) else enumerate(container)
+            for key, value in items:
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+                elif isinstance(value, _CONVERTED_TYPES):
+                    container[key] = self._sanitize_value(value)
+
+        return data
+
+    @staticmethod
+    def _media_to_dict(media, session_name: str) -> Dict:
+        try:
+            return media.to_dict()
+        except Exception as e:
+            logger.warning(f"[{session_name}] Could not convert media to dict: {e}")
+            return {"type": str(type(media))}
+
+    @staticmethod
+    def _group_messages(messages) -> Dict[int, List]:
+        """Map grouped_id to the album messages found in a batch"""
+        groups = {}
+        for message in messages:
+            if message.grouped_id:
+                groups.setdefault(message.grouped_id, []).append(message)
+
+        # Albums touching either end of the batch may continue past it,
+        # leave them out so their siblings are fetched from Telegram
+        if messages:
+            for edge_message in (messages[0], messages[-1]):
+                groups.pop(edge_message.grouped_id, None)
+
+        return groups
+
+    async def extract_message_data(
+            self, client, entity, message, session_name: str,
+            group_map: Optional[Dict[int, List]] = None
+    ) -> Dict:
         fwd_from = None
-        if message.fwd_from and hasattr(message.fwd_from, "from_id"):
-            if hasattr(message.fwd_from.from_id, "channel_id"):
-                fwd_from = message.fwd_from.from_id.channel_id
-
-        reactions_list = []
-        if message.reactions:
-            for reaction in message.reactions.results:
-                if hasattr(reaction.reaction, "emoticon"):
-                    reactions_list.append(
-                        {
-                            "count": reaction.count,
-                            "emoji": reaction.reaction.emoticon,
-                        }
-                    )
+        message_fwd_from = message.fwd_from
+        if message_fwd_from:
+            fwd_from = getattr(
+                getattr(message_fwd_from, "from_id", None), "channel_id", None
+            )
 
-        urls = []
-        if message.entities:
-            for entity_item in message.entities:
-                if hasattr(entity_item, "url") and entity_item.url:
-                    urls.append(entity_item.url)
+        reactions_list = [
+            {"count": reaction.count, "emoji": emoji}
+            for reaction in (message.reactions.results if message.reactions else ())
+            if (emoji := getattr(reaction.reaction, "emoticon", None)) is not None
+        ]
+
+        urls = [
+            url
+            for entity_item in (message.entities or ())
+            if (url := getattr(entity_item, "url", None))
+        ]
 
-        media_list = []
         try:
-            if message.grouped_id:
-                media_messages = []
-                async for msg in client.iter_messages(
-                        entity, min_id=message.id - 10, max_id=message.id + 10
-                ):
-                    if msg.grouped_id == message.grouped_id:
-                        media_messages.append(msg)
+            if group_map and message.grouped_id in group_map:
+                media_messages = group_map[message.grouped_id]
+            elif message.grouped_id:
+                async with self.session_manager.get_rpc_semaphore(session_name):
+                    media_messages = [
+                        msg
+                        async for msg in client.iter_messages(
+                            entity, min_id=message.id - 10, max_id=message.id + 10
+                        )
+                        if msg.grouped_id == message.grouped_id
+                    ]
             else:
                 media_messages = [message]
 
-            for msg in media_messages:
-                if msg.media:
-                    try:
-                        media_dict = msg.media.to_dict()
-                        media_list.append(media_dict)
-                    except Exception as e:
-                        logger.warning(f"[{session_name}] Could not convert media to dict: {e}")
-                        media_list.append({"type": str(type(msg.media))})
+            media_list = [
+                self._media_to_dict(msg.media, session_name)
+                for msg in media_messages
+                if msg.media
+            ]
         except Exception as e:
             logger.warning(f"[{session_name}] Error processing media: {e}")
             media_list = None
@@ -320,37 +431,46 @@ class TelegramCrawler:
 
         return self._sanitize_for_json(message_dict)
 
-    async def save_channel_messages(self, client, channel, entity, messages, session_name: str):
-        try:
-            async with async_session() as db_session:
-                channel_repo = ChannelRepository(db_session)
-                processed_ids = set()
-
-                for message in messages:
-                    if message.id in processed_ids:
-                        continue
+    async def save_channel_messages(
+            self, client, channel_repo, channel, entity, messages, session_name: str
+    ):
+        if not messages:
+            return
 
-                    message_data = await self.extract_message_data(
-                        client, entity, message, session_name
-                    )
-                    await channel_repo.save_channel_message(
-                        channel.id, message.id, message_data
+        try:
+            unique_messages = list({message.id: message for message in messages}.values())
+            group_map = self._group_messages(unique_messages)
+            semaphore = asyncio.Semaphore(self.extract_concurrency)
+
+            async def extract(message):
+                async with semaphore:
+                    return message.id, await self.extract_message_data(
+                        client, entity, message, session_name, group_map
                     )
-                    processed_ids.add(message.id)
 
+            rows = await asyncio.gather(*[extract(message) for message in unique_messages])
+            if await channel_repo.save_channel_messages_bulk(channel.id, rows):
+                newest_id = max(message_id for message_id, _ in rows)
+                latest_id = self._latest_id_by_channel.get(channel.id)
+                if latest_id is None or newest_id > latest_id:
+                    self._latest_id_by_channel[channel.id] = newest_id
                 logger.info(
-                    f"[{session_name}] Saved {len(processed_ids)} messages for channel {channel.name}"
+                    f"[{session_name}] Saved {len(rows)} messages for channel {channel.name}"
                 )
         except Exception as e:
             logger.error(f"[{session_name}] Error saving channel messages: {e}")
 
-    @staticmethod
-    async def get_latest_stored_message_id(channel_id: int) -> Optional[int]:
+    async def get_latest_stored_message_id(self, channel_repo, channel_id: int) -> Optional[int]:
+        # Prefetched in process_channels_by_category and kept current by
+        # save_channel_messages; channels discovered during the run are
+        # looked up once and then cached
+        if channel_id in self._latest_id_by_channel:
+            return self._latest_id_by_channel[channel_id]
+
         try:
-            async with async_session() as db_session:
-                channel_repo = ChannelRepository(db_session)
-                latest_message_id = await channel_repo.get_latest_message_id(channel_id)
-                return latest_message_id
+            latest_id = await channel_repo.get_latest_message_id(channel_id)
+            self._latest_id_by_channel[channel_id] = latest_id
+            return latest_id
         except Exception as e:
             logger.error(
                 f"Error getting latest message ID for channel {channel_id}: {e}"
@@ -358,14 +478,18 @@ class TelegramCrawler:
             return None
 
     async def process_channel(self, channel_url: str):
-        """Process a single channel - get info, similar channels, and related channels"""
+        """Process a single channel - get info, similar channels, and related channels
+
+        Returns True when the channel is done, False when it should be retried,
+        and None when no session could be allocated to try it.
+        """
         session_name = None
         
         try:
             client, session_name = await self.session_manager.get_client()
             if not client:
-                logger.error("All sessions are unavailable. Cannot process channel.")
-                return False
+                logger.warning("All sessions are unavailable. Cannot process channel.")
+                return None
 
             logger.info(f"[{session_name}] Processing: {channel_url}")
             
@@ -401,8 +525,9 @@ class TelegramCrawler:
                     )
 
                     # Get and process messages with batching
-                    await self._process_channel_messages(
+                    related_channel_ids = await self._process_channel_messages(
                         client,
+                        channel_repo,
                         main_channel,
                         entity,
                         session_name
@@ -412,11 +537,12 @@ class TelegramCrawler:
                     await self._process_related_channels(
                         client,
                         channel_repo,
-                        self.processed_message_cache.get(main_channel.id, []),
+                        related_channel_ids,
                         main_channel,
                         session_name
                     )
 
+                    await channel_repo.mark_channel_crawled(main_channel)
                     self.processed_channels.add(channel_url)
                     logger.info(f"[{session_name}] Completed processing channel: {channel_url}")
                     return True
@@ -426,8 +552,13 @@ class TelegramCrawler:
                     raise
 
         except FloodWaitError as e:
+            # Shorter waits are slept through by the client itself
+            # (FLOOD_SLEEP_THRESHOLD), so this session is out for a while
             wait_time = getattr(e, 'seconds', 60)
             logger.error(f"[{session_name}] Session hit rate limit, must wait {wait_time} seconds")
+            # Keep this session out of rotation until the flood wait is over
+            if session_name:
+                self.session_manager.mark_session_flooded(session_name, wait_time)
             return False  # Retry with another session
             
         except UserDeactivatedBanError:
@@ -447,56 +578,66 @@ class TelegramCrawler:
             if session_name:
                 self.session_manager.release_client(session_name)
 
-    async def _process_channel_messages(self, client, channel, entity, session_name: str):
-        """Get and process channel messages in batches, starting from the oldest not yet processed"""
+    async def _process_channel_messages(
+            self, client, channel_repo, channel, entity, session_name: str
+    ) -> List[int]:
+        """Get and process channel messages in batches, starting from the oldest not yet processed.
+
+        Returns the IDs of channels the new messages were forwarded from.
+        """
         # Get the latest channel message ID we have in the database
-        latest_id = await self.get_latest_stored_message_id(channel.id)
+        latest_id = await self.get_latest_stored_message_id(channel_repo, channel.id)
 
-        offset_id = 0
-        all_messages = []
-        processed_message_ids = set()
+        total_messages = 0
+        # Only forwarded channel IDs are kept, not the messages themselves
+        forwarded_channel_ids = {}
 
-        # Get messages in batches
-        while True:
-            batch = await self.get_channel_messages(
-                client, entity, min_id=latest_id, offset_id=offset_id, session_name=session_name
-            )
+        # Get messages in batches; each batch is saved in the background while
+        # the next one is fetched, with at most one save in flight
+        pending_save = None
+        try:
+            async for batch in self.iter_message_batches(
+                    client, entity, min_id=latest_id, session_name=session_name
+            ):
+                total_messages += len(batch)
+                forwarded_channel_ids.update(dict.fromkeys(
+                    self.extract_forwarded_channels(batch, channel.channel_id, session_name)
+                ))
+
+                if pending_save:
+                    await pending_save
+                pending_save = asyncio.create_task(
+                    self.save_channel_messages(
+                        client, channel_repo, channel, entity, batch, session_name
+                    )
+                )
 
-            if not batch:
                 logger.info(
-                    f"[{session_name}] No more messages to fetch for channel {channel.name}, stopped on ID: {offset_id}"
+                    f"[{session_name}] Fetched {len(batch)} messages, "
+                    f"total so far: {total_messages}, current ID: {batch[-1].id}"
                 )
-                break
-
-            new_messages = [m for m in batch if m.id not in processed_message_ids]
-
-            if not new_messages:
-                logger.info(f"[{session_name}] No new messages in this batch for channel {channel.name}")
-                break
-
-            # Update tracking variables
-            processed_message_ids.update(m.id for m in new_messages)
-            all_messages.extend(new_messages)
-
-            # Save this batch of messages
-            await self.save_channel_messages(client, channel, entity, new_messages, session_name)
-
-            # Get the maximum ID in this batch to use as the next offset
-            max_id_in_batch = max(m.id for m in batch)
-            if max_id_in_batch == offset_id or len(batch) < self.batch_size:
-                break
-            offset_id = max_id_in_batch
-
-            logger.info(
-                f"[{session_name}] Fetched and processed {len(new_messages)} messages, "
-                f"total so far: {len(all_messages)}, current ID: {offset_id}"
-            )
+        finally:
+            # Persist the last batch even if fetching stopped on an error
+            if pending_save:
+                await pending_save
 
         logger.info(
-            f"[{session_name}] Total new messages processed for {channel.name}: {len(all_messages)}"
+            f"[{session_name}] Total new messages processed for {channel.name}: {total_messages}"
         )
-        # Store all messages for later related channel processing
-        self.processed_message_cache[channel.id] = all_messages
+        return list(forwarded_channel_ids)
+
+    async def _get_or_create_channel_ids(self, channel_repo, channels_data: List[Dict]) -> List[int]:
+        """Upsert channels not yet seen this run and return the row IDs of all of them"""
+        links = list(dict.fromkeys(data["link"] for data in channels_data if data.get("link")))
+        new_channels = [
+            data for data in channels_data
+            if data.get("link") and data["link"] not in self._channel_id_cache
+        ]
+        if new_channels:
+            self._channel_id_cache.update(
+                await channel_repo.bulk_get_or_create_channels(new_channels)
+            )
+        return [self._channel_id_cache[link] for link in links if link in self._channel_id_cache]
 
     async def _process_similar_channels(
             self, client, channel_repo, entity, channel_url, main_channel, session_name: str
@@ -506,44 +647,63 @@ class TelegramCrawler:
         )
         logger.info(f"[{session_name}] Found {len(similar_channels_data)} similar channels")
 
-        for similar_data in similar_channels_data:
-            similar_channel = await channel_repo.get_or_create_channel(similar_data)
-            if similar_channel:
-                await channel_repo.add_similar_channel(main_channel, similar_channel)
+        similar_ids = await self._get_or_create_channel_ids(channel_repo, similar_channels_data)
+        await channel_repo.add_similar_channels(main_channel, similar_ids)
 
     async def _process_related_channels(
-            self, client, channel_repo, messages, main_channel, session_name: str
+            self, client, channel_repo, related_channel_ids, main_channel, session_name: str
     ):
         """Process and save related channels from forwarded messages"""
-        main_channel_id = getattr(main_channel, "channel_id", None)
-        related_channel_ids = await self.extract_forwarded_channels(
-            messages, main_channel_id, session_name
-        )
+        logger.info(f"[{session_name}] Found {len(related_channel_ids)} related channel IDs")
 
-        for related_id in related_channel_ids:
-            related_info, related_entity = await self.get_channel_info_by_id(
-                client, related_id, session_name
-            )
+        semaphore = asyncio.Semaphore(self.related_concurrency)
+
+        async def fetch_related(related_id):
+            async with semaphore:
+                return await self.get_channel_basic_by_id(client, related_id, session_name)
+
+        tasks = [asyncio.create_task(fetch_related(related_id)) for related_id in related_channel_ids]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Don't leave lookups running on a session that is about to be released;
+            # the original error (e.g. FloodWaitError) is re-raised as is
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        related_channels_data = []
+        for related_id, (related_info, _) in zip(related_channel_ids, results):
             if related_info:
-                related_channel = await channel_repo.get_or_create_channel(related_info)
-                if related_channel:
-                    await channel_repo.add_related_channel(
-                        main_channel, related_channel
-                    )
+                related_channels_data.append(related_info)
             else:
                 logger.warning(
                     f"[{session_name}] Could not get info for related channel ID: {related_id}"
                 )
 
-        logger.info(f"[{session_name}] Added {len(related_channel_ids)} related channels")
+        related_ids = await self._get_or_create_channel_ids(channel_repo, related_channels_data)
+        await channel_repo.add_related_channels(main_channel, related_ids)
+
+        logger.info(f"[{session_name}] Added {len(related_ids)} related channels")
+
+    @staticmethod
+    def _retry_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+        return min(base * 2 ** (attempt - 1), cap) * (1 + random.uniform(0, 0.5))
+
+    async def _requeue_after(self, channel_url: str, attempts: int, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            await self.channel_queue.put((channel_url, attempts))
+        finally:
+            # Done only after the requeue so queue.join() can't finish early
+            self.channel_queue.task_done()
 
     async def worker(self):
         """Worker that processes channels from the queue"""
-        async with self.worker_lock:
-            self.active_workers += 1
+        self.active_workers += 1
         
-        worker_id = id(asyncio.current_task())
-        worker_name = asyncio.current_task().get_name() if hasattr(asyncio.current_task(), "get_name") else f"worker-{worker_id}"
+        worker_name = asyncio.current_task().get_name()
         logger.info(f"Worker {worker_name} started")
         
         try:
@@ -557,44 +717,56 @@ class TelegramCrawler:
                         
                     # Get next channel to process with timeout
                     try:
-                        channel_url = await asyncio.wait_for(self.channel_queue.get(), timeout=30)
+                        channel_url, attempts = await asyncio.wait_for(self.channel_queue.get(), timeout=30)
                     except asyncio.TimeoutError:
+                        if self._retry_tasks:
+                            # Channels are waiting out a backoff and will be requeued
+                            continue
                         logger.info(f"Worker {worker_name} timed out waiting for new channels, shutting down")
                         break
-                    
-                    logger.info(f"Worker {worker_name} processing channel: {channel_url}")
-                    
-                    # Try to process the channel until it succeeds
-                    retry_count = 0
-                    success = False
-                    
-                    while not success:
-                        retry_count += 1
-                        if retry_count > 1:
-                            logger.info(f"Worker {worker_name} retry #{retry_count} for channel {channel_url}")
-                        
-                        success = await self.process_channel(channel_url)
-                        
-                        if not success:
-                            # Check if we still have available sessions before retrying
-                            available_count = self.session_manager.get_available_session_count()
-                            if available_count == 0:
-                                logger.error(f"Worker {worker_name}: No available sessions left. Putting channel back in queue.")
-                                # Put the channel back in the queue for potential future retry when new sessions are available
-                                self.channel_queue.put_nowait(channel_url)
-                                self.channel_queue.task_done()  # Mark current attempt as done
-                                break
-                                
-                            # Add a small delay before retrying with a different session
-                            wait_time = min(retry_count * 2, 15)  # Exponential backoff up to 15 seconds
-                            logger.info(f"Worker {worker_name} waiting {wait_time}s before retrying channel {channel_url}")
-                            await asyncio.sleep(wait_time)
-                    
-                    # Mark task as done only if we succeeded
+
+                    attempts += 1
+                    if attempts > 1:
+                        logger.info(f"Worker {worker_name} retry #{attempts} for channel {channel_url}")
+                    else:
+                        logger.info(f"Worker {worker_name} processing channel: {channel_url}")
+
+                    success = await self.process_channel(channel_url)
+                    if success is None:
+                        # No session was handed out, so nothing was attempted
+                        attempts -= 1
+
                     if success:
                         logger.info(f"Worker {worker_name} successfully processed channel {channel_url}")
-                        self.channel_queue.task_done()
-                    
+                    elif self.session_manager.get_available_session_count() == 0:
+                        logger.error(f"Worker {worker_name}: No available sessions left. Putting channel back in queue.")
+                        # Put the channel back in the queue for potential future retry when new sessions are available
+                        self.channel_queue.put_nowait((channel_url, attempts))
+                    elif attempts >= self.max_retries:
+                        logger.error(
+                            f"Worker {worker_name} giving up on channel {channel_url} "
+                            f"after {attempts} attempts"
+                        )
+                    else:
+                        # Back off in the background so this worker can take the next channel;
+                        # the retry task marks this attempt done once the channel is requeued
+                        # Never come back before a session is out of its flood wait; the
+                        # jittered backoff on top keeps channels requeued in the same
+                        # flood window from all returning at once
+                        wait_time = (
+                            self.session_manager.get_cooldown_remaining()
+                            + self._retry_delay(max(attempts, 1))
+                        )
+                        logger.info(f"Worker {worker_name} retrying channel {channel_url} in {wait_time:.1f}s")
+                        retry_task = asyncio.create_task(
+                            self._requeue_after(channel_url, attempts, wait_time)
+                        )
+                        self._retry_tasks.add(retry_task)
+                        retry_task.add_done_callback(self._retry_tasks.discard)
+                        continue
+
+                    self.channel_queue.task_done()
+
                 except Exception as e:
                     logger.error(f"Error in worker {worker_name}: {e}", exc_info=True)
                     # In case of unexpected error, try to mark the task as done to avoid deadlock
@@ -603,8 +775,7 @@ class TelegramCrawler:
                     except:
                         pass
         finally:
-            async with self.worker_lock:
-                self.active_workers -= 1
+            self.active_workers -= 1
             logger.info(f"Worker {worker_name} stopped")
 
     async def process_channels_by_category(self, categories: List[str]):
@@ -612,26 +783,46 @@ class TelegramCrawler:
             async with async_session() as db_session:
                 category_repo = CategoryRepository(db_session)
 
-                # Get all channel URLs from all categories
+                # Get all channel URLs from all categories that are due for a crawl
+                recrawl_interval = datetime.timedelta(hours=config.RECRAWL_INTERVAL_HOURS)
                 all_channels = []
                 for category in categories:
                     logger.info(f"Fetching channels for category: {category}")
-                    channel_urls = await category_repo.get_channel_urls_by_category(category)
+                    channel_urls = await category_repo.get_channel_urls_by_category(
+                        category, recrawl_interval
+                    )
                     logger.info(f"Found {len(channel_urls)} channels for category {category}")
                     all_channels.extend(channel_urls)
                 
-                # Filter out already processed channels
-                channels_to_process = [url for url in all_channels if url not in self.processed_channels]
-                logger.info(f"Total channels to process: {len(channels_to_process)}")
+                # Drop channels listed under several categories and already processed ones
+                channels_to_process = [
+                    url for url in dict.fromkeys(all_channels)
+                    if url not in self.processed_channels
+                ]
+                logger.info(
+                    f"Total channels to process: {len(channels_to_process)}/{len(all_channels)} "
+                    f"(skipped duplicates and already processed)"
+                )
+
+                # Resolve the latest stored message of every known channel in one query
+                channel_repo = ChannelRepository(db_session)
+                self._latest_id_by_channel = (
+                    await channel_repo.get_latest_message_ids_by_categories(categories)
+                )
                 
                 # Add all channels to the queue
                 for url in channels_to_process:
-                    await self.channel_queue.put(url)
+                    await self.channel_queue.put((url, 0))
                 
-                # Start worker tasks
+                # Start worker tasks, one per usable session at most since
+                # each worker holds its own session while processing a channel
+                worker_count = max(
+                    1,
+                    min(self.max_workers, self.session_manager.get_available_session_count()),
+                )
                 workers = []
-                logger.info(f"Starting {self.max_workers} workers to process channels...")
-                for i in range(self.max_workers):
+                logger.info(f"Starting {worker_count} workers to process channels...")
+                for i in range(worker_count):
                     worker_task = asyncio.create_task(self.worker(), name=f"worker-{i+1}")
                     workers.append(worker_task)
                 
@@ -658,6 +849,7 @@ class TelegramCrawler:
                 logger.info(f"Completed processing all categories")
         finally:
             await self.session_manager.close_all()
+            self.channel_info_cache.close()
 
     async def run(self, categories: Optional[List[str]] = None):
         try:
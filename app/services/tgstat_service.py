@@ -1,74 +1,216 @@
-import pickle
-import time
-from typing import Dict, List, Tuple
+import asyncio
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Set, Tuple
 
-from fake_useragent import UserAgent
 from selenium import webdriver
-from selenium.common.exceptions import StaleElementReferenceException
+from selenium.common.exceptions import ScriptTimeoutException
 from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions
 from selenium.webdriver.support.ui import WebDriverWait
 
 from app.config import logger, config
+from app.core.browser import new_chrome_driver, random_user_agent, stop_chrome_service
 from app.core.database import async_session
 from app.repositories.category_repository import CategoryRepository
 from app.repositories.tgstat_repository import TGStatRepository
 
+_CARD_SELECTOR = (By.CSS_SELECTOR, "div.card.card-body.peer-item-box")
+_SHOW_MORE = (By.CSS_SELECTOR, "button")
+_SHOW_MORE_TEXT = "Показать больше|Показати більше"
+
+# Indexed by is_public from extract_channel_username
+_TELEGRAM_PREFIXES = ("https://t.me/joinchat/", "https://t.me/")
+
+# arguments: show-more selector, show-more text pattern, card selector,
+# async callback. After each click it waits for more cards to render (up
+# to 5 s) instead of sleeping a fixed interval
+_LOAD_ALL_SCRIPT = """
+const [selector, pattern, cardSelector, done] = arguments;
+const text = new RegExp(pattern);
+const cardCount = () => document.querySelectorAll(cardSelector).length;
+// A rerun after a script timeout supersedes the loop still in the page
+const run = window.__loadAllRun = (window.__loadAllRun || 0) + 1;
+(function loop() {
+    if (window.__loadAllRun !== run) {
+        return;
+    }
+    const button = [...document.querySelectorAll(selector)].find(
+        b => text.test(b.textContent)
+    );
+    if (!button) {
+        done();
+        return;
+    }
+    const previous = cardCount();
+    button.click();
+    (function waitForCards(waited) {
+        if (cardCount() > previous) {
+            loop();
+        } else if (waited >= 5000) {
+            done();
+        } else {
+            setTimeout(() => waitForCards(waited + 100), 100);
+        }
+    })(0);
+})();
+"""
+
+# arguments: card selector; returns unique http links in page order
+_CARD_LINKS_SCRIPT = (
+    "return [...new Set([...document.querySelectorAll(arguments[0] + ' a')]"
+    ".map(a => a.href)"
+    ".filter(h => h && h.startsWith('http')))];"
+)
 
-class TGStatScraper:
-    def __init__(self):
-        ua = UserAgent()
-        user_agent = ua.random
 
+class TGStatScraper:
+    def __init__(self, max_workers: int = 4):
         self.options = Options()
         self.options.add_argument("--start-maximized")
         self.options.add_argument("window-size=1280,720")
-        self.options.add_argument(f"user-agent={user_agent}")
+        self.options.add_argument(f"user-agent={random_user_agent()}")
         self.options.add_argument("--headless")
-        self.driver = None
+        # Only the DOM is scraped, so skip images, styles and fonts and let
+        # driver.get return at DOMContentLoaded
+        self.options.add_experimental_option(
+            "prefs",
+            {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.stylesheets": 2,
+                "profile.managed_default_content_settings.fonts": 2,
+            },
+        )
+        self.options.page_load_strategy = "eager"
+        self.max_workers = max_workers
+        self.cookies: List[Dict] = []
+        # Threads and their drivers outlive a single run(); Chrome is only
+        # started once per thread and torn down in close()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._thread_local = threading.local()
+        self._drivers: List[webdriver.Remote] = []
+        self._drivers_lock = threading.Lock()
+        # Guards channels_by_category, read by scraping threads
+        self._channels_lock = threading.Lock()
         self.channels_by_category: Dict[str, List[str]] = {}
+        # Every URL in channels_by_category, for constant-time dedup
+        self._known_urls: Set[str] = set()
+        atexit.register(self.close)
 
     async def load_channels_from_db(self):
         async with async_session() as session:
             repo = CategoryRepository(session)
             self.channels_by_category = await repo.get_all_channels_by_category()
+            self._known_urls = {
+                url for urls in self.channels_by_category.values() for url in urls
+            }
             logger.info(
                 f"Loaded {len(self.channels_by_category)} categories from database"
             )
 
             return self.channels_by_category
 
-    def initialize_driver(self):
-        self.driver = webdriver.Chrome(options=self.options)
+    def initialize_driver(self) -> webdriver.Remote:
+        driver = new_chrome_driver(self.options)
+        with self._drivers_lock:
+            self._drivers.append(driver)
 
-    def scroll_to_bottom(self):
-        show_more_button_xpath = "//button[contains(text(), 'Показать больше') or contains(text(), 'Показати більше')]"
-
-        while True:
+        try:
+            self.apply_cookies(driver)
+        except Exception:
+            self.discard_driver(driver)
+            raise
+        return driver
+
+    def apply_cookies(self, driver: webdriver.Remote):
+        driver.get(config.BASE_URL)
+        driver.delete_all_cookies()
+        for cookie in self.cookies:
+            driver.add_cookie(cookie)
+
+    def refresh_cookies(self):
+        # Drivers outlive a run, so cookies re-saved by save_cookies.py have
+        # to be pushed into the ones already open
+        with self._drivers_lock:
+            drivers = list(self._drivers)
+
+        for driver in drivers:
             try:
-                show_more_button = WebDriverWait(self.driver, 3).until(
-                    expected_conditions.element_to_be_clickable(
-                        (By.XPATH, show_more_button_xpath)
+                self.apply_cookies(driver)
+            except WebDriverException as e:
+                logger.error(f"Error refreshing driver cookies, dropping driver: {e}")
+                self.discard_driver(driver)
+
+    def get_driver(self) -> webdriver.Remote:
+        driver = getattr(self._thread_local, "driver", None)
+        with self._drivers_lock:
+            # Dropped from another thread, e.g. by refresh_cookies
+            if driver is not None and driver not in self._drivers:
+                driver = None
+        if driver is None:
+            driver = self.initialize_driver()
+            self._thread_local.driver = driver
+        return driver
+
+    def discard_driver(self, driver: webdriver.Remote):
+        # A crashed browser or dead session would fail every later scrape on
+        # its thread; the thread starts a fresh one on its next category
+        with self._drivers_lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        if getattr(self._thread_local, "driver", None) is driver:
+            self._thread_local.driver = None
+
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.error(f"Error quitting driver: {e}")
+
+    def quit_drivers(self):
+        with self._drivers_lock:
+            for driver in self._drivers:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    logger.error(f"Error quitting driver: {e}")
+            self._drivers.clear()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.quit_drivers()
+        stop_chrome_service()
+
+    @staticmethod
+    def scroll_to_bottom(driver):
+        # Clicks "show more" inside the page until the button is gone, so
+        # there is no XPath evaluation or wait timeout per batch
+        driver.set_script_timeout(60)
+        try:
+            while True:
+                try:
+                    driver.execute_async_script(
+                        _LOAD_ALL_SCRIPT, _SHOW_MORE[1], _SHOW_MORE_TEXT, _CARD_SELECTOR[1]
                     )
-                )
-                self.driver.execute_script("arguments[0].click();", show_more_button)
-                time.sleep(1)
-            except TimeoutException:
-                break
-            except Exception as e:
-                logger.error(f"Error while scrolling: {type(e)}")
-                break
+                    break
+                except ScriptTimeoutException:
+                    # The script only runs this long while cards keep arriving
+                    # (it stops after 5 s without new ones), so keep going
+                    logger.info("Still loading more channels, continuing")
+        except WebDriverException:
+            raise
+        except Exception as e:
+            logger.error(f"Error while scrolling: {type(e)}")
 
     @staticmethod
     def extract_channel_username(url):
-        if "?" in url:
-            url = url.split("?")[0]
+        path = url.partition("?")[0]
+        username = path.rstrip("/").rpartition("/")[2]
 
-        username = url.strip("/").split("/")[-1]
-
-        if not username or "#" in username or len(username) < 2:
+        if "#" in username or len(username) < 2:
             return None, False
 
         if username.startswith("@"):
@@ -76,27 +218,17 @@ class TGStatScraper:
 
         return username, False
 
-    def collect_channel_detail_urls(self):
-        detail_urls = []
-        selector = "//div[contains(@class, 'card card-body peer-item-box')]"
-
-        cards = self.driver.find_elements(By.XPATH, selector)
-
-        for i, card in enumerate(cards):
-            try:
-                links = card.find_elements(By.TAG_NAME, "a")
-                for link in links:
-                    href = link.get_attribute("href")
-                    if href and href.startswith("http") and href not in detail_urls:
-                        detail_urls.append(href)
-            except StaleElementReferenceException:
-                logger.error(f"Element unreachable, skipping..")
-                continue
-            except Exception as e:
-                logger.error(f"Error processing card #{i + 1}: {e}")
-                continue
-
-        return detail_urls
+    @staticmethod
+    def collect_channel_detail_urls(driver):
+        # One script call snapshots every card link, instead of a WebDriver
+        # round-trip per card and per href
+        try:
+            return driver.execute_script(_CARD_LINKS_SCRIPT, _CARD_SELECTOR[1]) or []
+        except WebDriverException:
+            raise
+        except Exception as e:
+            logger.error(f"Error collecting channel links: {e}")
+            return []
 
     async def save_to_db(self, category_name: str, processed_urls: List[str]):
         logger.info(
@@ -110,12 +242,12 @@ class TGStatScraper:
                 )
 
                 if success:
-                    if category_name not in self.channels_by_category:
-                        self.channels_by_category[category_name] = []
-
-                    for url in processed_urls:
-                        if url not in self.channels_by_category[category_name]:
-                            self.channels_by_category[category_name].append(url)
+                    # process_channel_urls already dropped URLs in _known_urls
+                    with self._channels_lock:
+                        self.channels_by_category.setdefault(category_name, []).extend(
+                            processed_urls
+                        )
+                        self._known_urls.update(processed_urls)
 
                 return success
 
@@ -126,47 +258,52 @@ class TGStatScraper:
     def process_channel_urls(
         self, channel_urls: List[str], category_name: str
     ) -> List[str]:
-        if category_name not in self.channels_by_category:
-            self.channels_by_category[category_name] = []
-
-        processed_urls = []
-        for url in channel_urls:
-            username, is_public = self.extract_channel_username(url)
-
-            if username:
-                if is_public:
-                    telegram_url = f"https://t.me/{username}"
-                else:
-                    telegram_url = f"https://t.me/joinchat/{username}"
+        with self._channels_lock:
+            if category_name not in self.channels_by_category:
+                self.channels_by_category[category_name] = []
 
-                url_exists = False
-                for urls in self.channels_by_category.values():
-                    if telegram_url in urls:
-                        url_exists = True
-                        break
+            processed_urls = []
+            for url in channel_urls:
+                username, is_public = self.extract_channel_username(url)
 
-                if not url_exists:
-                    processed_urls.append(telegram_url)
+                if username:
+                    telegram_url = _TELEGRAM_PREFIXES[is_public] + username
+                    if telegram_url not in self._known_urls:
+                        processed_urls.append(telegram_url)
+                        self._known_urls.add(telegram_url)
 
-        return processed_urls
+            return processed_urls
 
     def scrape_category(self, url: str) -> Tuple[str, List[str]]:
         try:
             category_name = url.split("/")[-1]
             logger.info(f"Scraping category: {category_name}...")
 
-            self.driver.get(url)
-            WebDriverWait(self.driver, 10).until(
-                expected_conditions.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            time.sleep(1)
+            driver = self.get_driver()
+        except Exception as e:
+            logger.error(f"Error starting driver: {e}")
+            return "", []
 
-            self.scroll_to_bottom()
+        try:
+            driver.get(url)
+            try:
+                WebDriverWait(driver, 10).until(
+                    expected_conditions.presence_of_element_located(_CARD_SELECTOR)
+                )
+            except TimeoutException:
+                logger.warning(f"No channels found in category: {category_name}")
+                return category_name, []
 
-            channel_urls = self.collect_channel_detail_urls()
+            self.scroll_to_bottom(driver)
+
+            channel_urls = self.collect_channel_detail_urls(driver)
             processed_urls = self.process_channel_urls(channel_urls, category_name)
 
             return category_name, processed_urls
+        except WebDriverException as e:
+            logger.error(f"Driver error scraping category, restarting driver: {e}")
+            self.discard_driver(driver)
+            return "", []
         except Exception as e:
             logger.error(f"Error scraping category: {e}")
             return "", []
@@ -175,18 +312,22 @@ class TGStatScraper:
         try:
             await self.load_channels_from_db()
 
-            self.initialize_driver()
+            self.cookies = config.read_json(config.COOKIES_FILE)
 
-            self.driver.get(config.BASE_URL)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self.refresh_cookies)
 
-            cookies = pickle.load(open(config.COOKIES_FILE, "rb"))
-            for cookie in cookies:
-                self.driver.add_cookie(cookie)
-
-            for category in categories:
-                category_name, processed_urls = self.scrape_category(
-                    f"{config.BASE_URL}/{category}"
+            # Categories are scraped in parallel, each thread with its own
+            # driver; results are saved as soon as each category finishes
+            scrapes = [
+                loop.run_in_executor(
+                    self._executor, self.scrape_category, f"{config.BASE_URL}/{category}"
                 )
+                for category in categories
+            ]
+
+            for scrape in asyncio.as_completed(scrapes):
+                category_name, processed_urls = await scrape
 
                 if processed_urls:
                     await self.save_to_db(category_name, processed_urls)
@@ -196,6 +337,3 @@ class TGStatScraper:
         except Exception as e:
             logger.error(f"Unexpected error occurred: {e}")
             return None
-        finally:
-            if self.driver:
-                self.driver.quit()
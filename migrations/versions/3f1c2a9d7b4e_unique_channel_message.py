@@ -0,0 +1,53 @@
+"""Make (channel_id, message_id) unique in channel_messages
+
+Revision ID: 3f1c2a9d7b4e
+Revises:
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c2a9d7b4e"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONSTRAINT_NAME = "channel_messages_channel_id_message_id_key"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # Fresh databases get the constraint from init_db()
+    if not inspector.has_table("channel_messages"):
+        return
+    if any(
+        constraint["name"] == CONSTRAINT_NAME
+        for constraint in inspector.get_unique_constraints("channel_messages")
+    ):
+        return
+
+    # The old select-then-update save could store a message more than once;
+    # keep the most recently inserted copy
+    op.execute(
+        """
+        DELETE FROM channel_messages older
+        USING channel_messages newer
+        WHERE older.channel_id = newer.channel_id
+          AND older.message_id = newer.message_id
+          AND older.id < newer.id
+        """
+    )
+    op.create_unique_constraint(
+        CONSTRAINT_NAME, "channel_messages", ["channel_id", "message_id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(CONSTRAINT_NAME, "channel_messages", type_="unique")
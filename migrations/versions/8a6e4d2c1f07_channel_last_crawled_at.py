@@ -0,0 +1,41 @@
+"""Add channels.last_crawled_at
+
+Revision ID: 8a6e4d2c1f07
+Revises: 3f1c2a9d7b4e
+Create Date: 2026-10-15 12:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a6e4d2c1f07"
+down_revision: Union[str, None] = "3f1c2a9d7b4e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # Fresh databases get the column from init_db()
+    if not inspector.has_table("channels"):
+        return
+    if any(
+        column["name"] == "last_crawled_at"
+        for column in inspector.get_columns("channels")
+    ):
+        return
+
+    op.add_column(
+        "channels",
+        sa.Column("last_crawled_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("channels", "last_crawled_at")
@@ -1,32 +1,29 @@
-import pickle
 import time
 
-from fake_useragent import UserAgent
-from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
 from app.config import config
+from app.core.browser import new_chrome_driver, random_user_agent, stop_chrome_service
 
 
 def save_cookies():
-    ua = UserAgent()
-    user_agent = ua.random
-
     options = Options()
     options.add_argument("--start-maximized")
     options.add_argument("window-size=1280,720")
-    options.add_argument(f"user-agent={user_agent}")
-
-    driver = webdriver.Chrome(options=options)
+    options.add_argument(f"user-agent={random_user_agent()}")
 
-    driver.get(config.BASE_URL)
+    driver = new_chrome_driver(options)
+    try:
+        driver.get(config.BASE_URL)
 
-    time.sleep(15)
+        time.sleep(15)
 
-    cookies = driver.get_cookies()
+        cookies = driver.get_cookies()
 
-    with open(config.COOKIES_FILE, 'wb') as file:
-        pickle.dump(cookies, file)
+        config.write_json(config.COOKIES_FILE, cookies)
+    finally:
+        driver.quit()
+        stop_chrome_service()
 
 
 if __name__ == "__main__":
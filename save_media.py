@@ -1,13 +1,26 @@
+import asyncio
 import base64
+import os
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Iterable, Optional, Tuple
 
-import magic
 from telethon.tl.types import InputDocumentFileLocation
 from telethon.tl.types import InputPhotoFileLocation
 
 MEDIA_DIR = "media"
 
+_magic = None
+
+
+def _get_magic():
+    # libmagic is loaded through ctypes on import; most files never need it
+    global _magic
+    if _magic is None:
+        import magic
+
+        _magic = magic
+    return _magic
+
 
 def get_file_extension(mime_type: str) -> str:
     mime_to_ext = {
@@ -34,15 +47,92 @@ def get_file_extension(mime_type: str) -> str:
     return mime_to_ext.get(mime_type, '')
 
 
-async def save_media(client, file_location, file_path) -> None:
-    downloaded_bytes = await client.download_file(file_location)
-    if downloaded_bytes:
-        mime = magic.from_buffer(downloaded_bytes, mime=True)
-        file_ext = get_file_extension(mime)
+_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"II*\x00", ".tiff"),
+    (b"MM\x00*", ".tiff"),
+    (b"OggS", ".ogg"),
+    (b"ID3", ".mp3"),
+    (b"FLV", ".flv"),
+    (b"\x1aE\xdf\xa3", ".webm"),
+)
+
+_RIFF_FORMATS = {
+    b"WEBP": ".webp",
+    b"WAVE": ".wav",
+    b"AVI ": ".avi",
+}
+
+# ISO media major brands; anything else (HEIC, AVIF, M4A, 3GP, ...) is left
+# to libmagic
+_FTYP_BRANDS = {
+    b"isom": ".mp4",
+    b"iso2": ".mp4",
+    b"mp41": ".mp4",
+    b"mp42": ".mp4",
+    b"avc1": ".mp4",
+    b"dash": ".mp4",
+    b"M4V ": ".mp4",
+    b"qt  ": ".mov",
+}
+
+# BITMAPCOREHEADER, BITMAPINFOHEADER and its V2-V5 successors
+_BMP_HEADER_SIZES = {12, 40, 52, 56, 108, 124}
+
+
+def sniff_ext(buf: bytes) -> str:
+    for signature, ext in _SIGNATURES:
+        if buf.startswith(signature):
+            return ext
+
+    if buf[:4] == b"RIFF":
+        return _RIFF_FORMATS.get(buf[8:12], "")
+
+    if buf[4:8] == b"ftyp":
+        return _FTYP_BRANDS.get(buf[8:12], "")
+
+    # "BM" alone is too common a prefix; also require zeroed reserved
+    # bytes and a known DIB header size
+    if (
+        buf[:2] == b"BM"
+        and buf[6:10] == b"\x00\x00\x00\x00"
+        and int.from_bytes(buf[14:18], "little") in _BMP_HEADER_SIZES
+    ):
+        return ".bmp"
+
+    return ""
+
+
+async def save_media(client, file_location, file_path) -> Optional[str]:
+    # Telethon streams the file to disk chunk by chunk, so large videos are
+    # never held in memory; the type is sniffed from the head afterwards
+    part_path = file_path + ".part"
+    try:
+        await client.download_file(file_location, file=part_path)
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    if not os.path.getsize(part_path):
+        os.remove(part_path)
+        return None
+
+    with open(part_path, "rb") as f:
+        header = f.read(2048)
+
+    # Header bytes identify the usual Telegram media; libmagic is only
+    # needed for anything else
+    file_ext = sniff_ext(header)
+    if not file_ext:
+        file_ext = get_file_extension(_get_magic().from_buffer(header, mime=True))
 
-        with open(file_path + file_ext, "wb") as f:
-            f.write(downloaded_bytes)
-        return file_path
+    full_path = file_path + file_ext
+    os.replace(part_path, full_path)
+    return full_path
 
 
 async def format_file_location_data(media_data: dict):
@@ -77,7 +167,8 @@ async def download_media_from_dict(client, channel_id: str, message_id: str, med
                             thumb_size="x"
                         )
 
-                        await save_media(client, file_location, file_name)
+                        # Albums share a message ID, so the media ID keeps names apart
+                        await save_media(client, file_location, f"{file_name}_{media_id}")
                     except Exception as loc_error:
                         print(f"Failed to download photo via location: {loc_error}")
 
@@ -95,7 +186,7 @@ async def download_media_from_dict(client, channel_id: str, message_id: str, med
                             thumb_size=""
                         )
 
-                        await save_media(client, file_location, file_name)
+                        await save_media(client, file_location, f"{file_name}_{media_id}")
                     except Exception as loc_error:
                         print(f"Failed to download document via location: {loc_error}")
         else:
@@ -103,3 +194,19 @@ async def download_media_from_dict(client, channel_id: str, message_id: str, med
 
     except Exception as e:
         print(f"Error downloading media from dict: {e}")
+
+
+async def download_media_batch(
+    client, media_items: Iterable[Tuple[str, str, Dict]], concurrency: int = 8
+) -> None:
+    # Downloads share one client; overlapping them hides the per-file
+    # round-trip to the DC
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def download(channel_id: str, message_id: str, media_dict: Dict) -> None:
+        async with semaphore:
+            await download_media_from_dict(client, channel_id, message_id, media_dict)
+
+    await asyncio.gather(
+        *(download(channel_id, message_id, media_dict) for channel_id, message_id, media_dict in media_items)
+    )